@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import tempfile
+import json
 import shutil
 from judge import get_strategies, play_full_league, make_report, payoff
 import pandas as pd
@@ -142,16 +143,16 @@ def run_mini_league(new_strategy_code, strategy_name):
         # 리그전 실행
         strategies = get_strategies('strategies')
         total_records = play_full_league('strategies', strategies)
-        report_file = make_report(strategies, total_records)
+        report_file = make_report(strategies, total_records, 'json')
         
-        # 결과 읽기
+        # 결과 읽기 (json 보고서를 그대로 불러옴)
         with open(report_file, 'r', encoding='utf-8') as f:
-            result_content = f.read()
+            report = json.load(f)
         
         # 원래 디렉토리로 복귀
         os.chdir(original_cwd)
         
-        return result_content, strategies
+        return report, strategies
         
     finally:
         # 임시 디렉토리 정리
@@ -321,62 +322,37 @@ def main():
         if False:  # 실행되지 않도록 False로 설정
             with st.spinner("미니 리그전 진행 중..."):
                 try:
-                    result_content, strategies = run_mini_league(
+                    report, strategies = run_mini_league(
                         st.session_state.strategy_code, 
                         st.session_state.strategy_name
                     )
                     
                     st.success("미니 리그전 완료!")
                     
-                    # 결과 파싱 및 표시
-                    lines = result_content.split('\n')
+                    # 순위표 표시
+                    st.markdown("### 🏆 미니 리그전 결과")
+                    rank_data = [
+                        {'순위': row['ranking'], '전략': row['strategy'], '점수': row['score']}
+                        for row in report['obtained']
+                    ]
                     
-                    # 전략-파일 매핑 찾기
-                    strategy_mapping = {}
-                    for i, line in enumerate(lines):
-                        if line.startswith('file,strategy'):
-                            for j in range(i+1, len(lines)):
-                                if lines[j].strip() == '':
-                                    break
-                                parts = lines[j].split(',')
-                                if len(parts) == 2:
-                                    strategy_mapping[parts[1]] = parts[0]
+                    df = pd.DataFrame(rank_data)
+                    st.dataframe(df, use_container_width=True)
                     
-                    # 순위표 찾기
-                    for i, line in enumerate(lines):
-                        if line.startswith('ranking,strategy,obtained'):
-                            st.markdown("### 🏆 미니 리그전 결과")
-                            rank_data = []
-                            for j in range(i+1, len(lines)):
-                                if lines[j].strip() == '':
-                                    break
-                                parts = lines[j].split(',')
-                                if len(parts) == 3:
-                                    rank_data.append({
-                                        '순위': parts[0],
-                                        '전략': parts[1],
-                                        '점수': parts[2]
-                                    })
-                            
-                            df = pd.DataFrame(rank_data)
-                            st.dataframe(df, use_container_width=True)
-                            
-                            # 내 전략 결과 하이라이트
-                            my_rank = None
-                            for rank in rank_data:
-                                if rank['전략'] == st.session_state.strategy_name:
-                                    my_rank = rank['순위']
-                                    break
-                            
-                            if my_rank:
-                                if my_rank == '1':
-                                    st.balloons()
-                                    st.success(f"🎉 축하합니다! '{st.session_state.strategy_name}' 전략이 1위를 차지했습니다!")
-                                else:
-                                    st.info(f"'{st.session_state.strategy_name}' 전략이 {my_rank}위를 기록했습니다.")
-                            
+                    # 내 전략 결과 하이라이트
+                    my_rank = None
+                    for rank in rank_data:
+                        if rank['전략'] == st.session_state.strategy_name:
+                            my_rank = rank['순위']
                             break
                     
+                    if my_rank:
+                        if my_rank == 1:
+                            st.balloons()
+                            st.success(f"🎉 축하합니다! '{st.session_state.strategy_name}' 전략이 1위를 차지했습니다!")
+                        else:
+                            st.info(f"'{st.session_state.strategy_name}' 전략이 {my_rank}위를 기록했습니다.")
+                    
                 except Exception as e:
                     st.error(f"리그전 실행 중 오류가 발생했습니다: {str(e)}")
 
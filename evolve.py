@@ -0,0 +1,198 @@
+import os
+import random
+import importlib
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from judge import get_strategies, check_code_of_a_strategy, payoff, draw_rounds, available_decisions
+
+# a memory-k strategy decides by the decisions of the last k games (both mine and yours).
+# each game is 2 bits (mine<<1 | yours, 'C' is 0 and 'D' is 1) and the latest game is in the lowest bits,
+# so there are 4**k states and the genome has one decision bit per state.
+# the last 2*k bits of the genome are the premise: an imagined history before the first game.
+
+# payoff_table[mine][yours] is my score, derived from judge.payoff
+payoff_table = np.array([[payoff(x, y)[0] for y in 'CD'] for x in 'CD'], dtype = np.float64)
+
+# opponents are loaded once per process(see load_opponents)
+opponents = []
+
+def count_states(memory):
+    return 4**memory
+
+def genome_length(memory):
+    """decision bits for every state + premise bits"""
+    return count_states(memory) + 2*memory
+
+def pack(bits):
+    """packs genomes of 0/1 into compact bit arrays(8 bits per byte)"""
+    return np.packbits(bits, axis = -1)
+
+def unpack(packed, memory):
+    return np.unpackbits(packed, axis = -1, count = genome_length(memory))
+
+def load_opponents(directory, strategies):
+    """imports the fixed opponents. this is also the initializer of each worker process"""
+    opponents.clear()
+    for module, strategy in strategies.items():
+        opponents.append(getattr(importlib.import_module(f'{directory}.{module}'), strategy))
+
+def play_against(genomes, opponent, n, memory):
+    """plays n rounds games between every genome and one opponent at once, and returns each genome's total score"""
+    p = len(genomes)
+    states = count_states(memory)
+    table = genomes[:, :states]
+    state = genomes[:, states:].astype(np.int64) @ (1 << np.arange(2*memory))
+    rows = np.arange(p)
+    scores = np.zeros(p)
+
+    # the opponent is an ordinary strategy function, so it still gets decision lists like in judge.play_full_league
+    genome_decisions = [[] for _ in range(p)]
+    opponent_decisions = [[] for _ in range(p)]
+    for _ in range(n):
+        # decisions of the whole population are looked up at once
+        mine = table[rows, state]
+        yours = np.empty(p, dtype = np.uint8)
+        for i in range(p):
+            # copies like judge.play_full_league, so a strategy changing its arguments can't touch the records
+            decision = opponent(list(opponent_decisions[i]), list(genome_decisions[i]))
+            if decision not in available_decisions:
+                print('all the decisions should be cooperate(C) or defect(D), but something else was returned.')
+                raise Exception
+            yours[i] = decision in 'dD'
+            opponent_decisions[i].append(decision)
+            genome_decisions[i].append('D' if mine[i] else 'C')
+        scores += payoff_table[mine, yours]
+        state = ((state << 2) | (mine << 1) | yours) & (states-1)
+    return scores
+
+def evaluate_chunk(packed, n, memory, seed):
+    """total score of each genome in packed against all the opponents"""
+    # opponents like '랜덤' use random, so each chunk gets its own seed
+    random.seed(seed)
+    genomes = unpack(packed, memory)
+    scores = np.zeros(len(genomes))
+    for opponent in opponents:
+        scores += play_against(genomes, opponent, n, memory)
+    return scores
+
+def evaluate_population(population, n, memory, rng, executor = None, workers = 1):
+    """fitness(average score per game) of each genome. identical genomes are evaluated only once"""
+    unique, inverse = np.unique(population, axis = 0, return_inverse = True)
+    chunks = np.array_split(unique, min(workers, len(unique)))
+    seeds = rng.integers(2**32, size = len(chunks)).tolist()
+    if executor is None:
+        results = map(evaluate_chunk, chunks, [n]*len(chunks), [memory]*len(chunks), seeds)
+    else:
+        results = executor.map(evaluate_chunk, chunks, [n]*len(chunks), [memory]*len(chunks), seeds)
+    scores = np.concatenate(list(results))
+    return scores[inverse.reshape(-1)] / (n*len(opponents))
+
+def next_generation(population, fitness, memory, rng, crossover_rate, mutation_rate, elites, tournament_size):
+    """makes next population by tournament selection, one-point crossover and bit-flip mutation. the best genomes survive as they are"""
+    genomes = unpack(population, memory)
+    p, length = genomes.shape
+    children = p - elites
+
+    # tournament selection: each parent is the fittest of tournament_size random genomes
+    contestants = rng.integers(p, size = (children, 2, tournament_size))
+    winners = fitness[contestants].argmax(axis = -1)
+    parents = np.take_along_axis(contestants, winners[..., None], axis = -1)[..., 0]
+    mothers = genomes[parents[:, 0]]
+    fathers = genomes[parents[:, 1]]
+
+    # one-point crossover: bits from the crossover point come from the father
+    points = rng.integers(1, length, size = children)
+    crossed = rng.random(children) < crossover_rate
+    from_father = (np.arange(length) >= points[:, None]) & crossed[:, None]
+    offspring = np.where(from_father, fathers, mothers)
+
+    # mutation
+    offspring ^= (rng.random((children, length)) < mutation_rate).astype(np.uint8)
+
+    best = np.argsort(fitness)[::-1][:elites]
+    return pack(np.concatenate([genomes[best], offspring]))
+
+def evolve(directory = 'strategies', memory = 3, population_size = 20, generations = 200,
+           crossover_rate = 0.7, mutation_rate = 0.005, elites = 2, tournament_size = 3,
+           workers = None, seed = None):
+    """evolves memory-k strategies against the strategies in directory.
+    returns final population(packed, best first), its fitness and (best, mean) fitness of each generation"""
+    if generations < 1:
+        print(f'generations should be 1 or more, but {generations} was given.')
+        raise Exception
+    if not 0 <= elites <= population_size:
+        print(f'elites should be between 0 and population_size({population_size}), but {elites} was given.')
+        raise Exception
+    strategies = get_strategies(directory)
+    rng = np.random.default_rng(seed)
+    if seed is not None:
+        # the number of rounds is drawn by judge.draw_rounds, which uses random
+        random.seed(seed)
+    workers = workers or os.cpu_count() or 1
+
+    population = pack(rng.integers(0, 2, size = (population_size, genome_length(memory)), dtype = np.uint8))
+    history = []
+
+    if workers == 1:
+        load_opponents(directory, strategies)
+        pool = nullcontext()
+    else:
+        pool = ProcessPoolExecutor(workers, initializer = load_opponents, initargs = (directory, strategies))
+        # opponents are also needed in this process to count them
+        load_opponents(directory, strategies)
+
+    with pool as executor:
+        for generation in range(generations):
+            n = draw_rounds()
+            fitness = evaluate_population(population, n, memory, rng, executor, workers)
+            history.append((fitness.max(), fitness.mean()))
+            print(f'generation {generation+1}: best {fitness.max():.3f}, mean {fitness.mean():.3f} ({n} rounds)')
+            if generation < generations-1:
+                population = next_generation(population, fitness, memory, rng,
+                                             crossover_rate, mutation_rate, elites, tournament_size)
+
+    order = np.argsort(fitness)[::-1]
+    return population[order], fitness[order], history
+
+def genome_to_code(genome, strategy_name, memory):
+    """writes a genome(unpacked) as a strategy code which follows the rules of judge.get_strategies"""
+    states = count_states(memory)
+    table = ''.join('D' if bit else 'C' for bit in genome[:states])
+    premise = int(sum(int(bit) << i for i, bit in enumerate(genome[states:])))
+    return f"""def {strategy_name}(mine, yours):
+    # memory-{memory} lookup table strategy, evolved by evolve.py
+    # state keeps the last {memory} games, 2 bits per game(mine<<1 | yours, D is 1), the latest game in the lowest bits
+    table = '{table}'
+    # before the first game, state starts from an imagined history
+    state = {premise}
+    for my, your in zip(mine[-{memory}:], yours[-{memory}:]):
+        state = ((state << 2) | ((my in 'dD') << 1) | (your in 'dD')) & {states-1}
+    return table[state]
+"""
+
+def export_strategies(population, memory, directory = 'evolved', prefix = '진화'):
+    """exports genomes(packed) as strategy files 'evolved_1.py', 'evolved_2.py', ... and checks them with get_strategies"""
+    os.makedirs(directory, exist_ok = True)
+    for i, genome in enumerate(unpack(population, memory)):
+        code = genome_to_code(genome, f'{prefix}{i+1}', memory)
+        # generated code should pass the same check as hand-written strategy files
+        check_code_of_a_strategy(code)
+        with open(f'{directory}/evolved_{i+1}.py', 'w', encoding = 'utf-8') as f:
+            f.write(code)
+    return get_strategies(directory)
+
+if __name__ == '__main__':
+    # directory where the fixed opponents are located
+    directory = 'strategies'
+
+    # memory-3 strategies like Axelrod's genetic algorithm experiment
+    memory = 3
+
+    # population is an array of packed genomes, sorted from the best
+    population, fitness, history = evolve(directory, memory, population_size = 20, generations = 200)
+
+    # the best genomes are exported into 'evolved/' as strategy files.
+    # copy them into 'strategies/' to let them join the full league of judge.py
+    strategies = export_strategies(population[:3], memory)
+    print(f'{list(strategies.values())} were successfully exported (fitness: {fitness[:3].round(3).tolist()})')
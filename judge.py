@@ -1,5 +1,6 @@
 import os
 from random import randint
+from collections import Counter
 
 def payoff(x, y):
     """payoff matrix presents score of each cases"""
@@ -18,44 +19,44 @@ def payoff(x, y):
         print(f'x:{x}, y:{y}')
         raise Exception
 
-def get_strategies(directory):
-    """gets strategy files in directory 'strategies/'"""
-    def check_code_of_a_strategy(strategy_code):
-        """checks the lines of strategy_code and returns function name if there's no problem"""
-        def_count = strategy_code.count('def ')
-        if def_count != 1:
-            print(f"make the number of 'def' from {def_count} to 1")
-            raise Exception
-        elif ';' in strategy_code:
-            print('using semicolon(;) is forbidden.')
-            print('delete all the semicolon(s) in your strategy code file.')
-            raise Exception
-        else:
-            # then there's no problem. so,
-            pass
-        code_lines = strategy_code.split('\n')
-        for line in code_lines:
-            if line == '':
-                continue
-            # extracting function name from strategy file
-            if line.startswith('def ') and '(' in line and ')' in line and ':' in line:
-                strategy_name = line.split('(')[0].split()[-1]
-            elif line.startswith('\n') or line.startswith('\t') or line.startswith(' ') or line.startswith('#') or line.startswith("'") or line.startswith('"'):
-                continue
-            elif line.startswith('from') or line.startswith('import'):
-                if ' os' in line:
-                    print('Using os module is forbidden.')
-                    raise Exception
-                else:
-                    continue
-            else:
-                print(f'check the line below:\n{line}')
-                print('[principles]')
-                print('you may not use use globals in strategy file.')
-                print("""line should startswith...   (#, ', ", from, import, def)""")                
+def check_code_of_a_strategy(strategy_code):
+    """checks the lines of strategy_code and returns function name if there's no problem"""
+    def_count = strategy_code.count('def ')
+    if def_count != 1:
+        print(f"make the number of 'def' from {def_count} to 1")
+        raise Exception
+    elif ';' in strategy_code:
+        print('using semicolon(;) is forbidden.')
+        print('delete all the semicolon(s) in your strategy code file.')
+        raise Exception
+    else:
+        # then there's no problem. so,
+        pass
+    code_lines = strategy_code.split('\n')
+    for line in code_lines:
+        if line == '':
+            continue
+        # extracting function name from strategy file
+        if line.startswith('def ') and '(' in line and ')' in line and ':' in line:
+            strategy_name = line.split('(')[0].split()[-1]
+        elif line.startswith('\n') or line.startswith('\t') or line.startswith(' ') or line.startswith('#') or line.startswith("'") or line.startswith('"'):
+            continue
+        elif line.startswith('from') or line.startswith('import'):
+            if ' os' in line:
+                print('Using os module is forbidden.')
                 raise Exception
-        return strategy_name
+            else:
+                continue
+        else:
+            print(f'check the line below:\n{line}')
+            print('[principles]')
+            print('you may not use use globals in strategy file.')
+            print("""line should startswith...   (#, ', ", from, import, def)""")                
+            raise Exception
+    return strategy_name
 
+def get_strategies(directory):
+    """gets strategy files in directory 'strategies/'"""
     strategyfiles = os.listdir(directory)
     if '__pycache__' in strategyfiles:
         strategyfiles.remove('__pycache__')
@@ -77,9 +78,16 @@ def get_strategies(directory):
             print(f"strategy '{strategy_name}' was found.")
     return strategies
 
+# every decision of a strategy should be one of these
+available_decisions = ['c', 'd', 'C', 'D']
+
+def draw_rounds():
+    """1 match consists of n rounds games, and n is drawn once per league"""
+    return randint(200, 400)
+
 def play_full_league(directory, strategies):
     # 1 match consists of n rounds games
-    n = randint(200, 400)
+    n = draw_rounds()
     total_records = {}
     print("playing full leagues...")
 
@@ -96,7 +104,6 @@ def play_full_league(directory, strategies):
 
     # league start
     for pair_of_strategies in pairs_of_strategies:
-        available_decisions = ['c', 'd', 'C', 'D']
         left = pair_of_strategies[0]
         right = pair_of_strategies[1]
         left_decisions = []
@@ -113,8 +120,21 @@ def play_full_league(directory, strategies):
         total_records[pair_of_strategies] = (left_decisions, right_decisions)
     return total_records
 
-def make_report(strategies, total_records):
-    """after deriving scores from records, generates report"""
+def rank_scores(scores):
+    """ranks scores in one pass. tied scores share the same (best) ranking, like 1, 2, 2, 4"""
+    ranking = {}
+    previous_score = None
+    previous_rank = 0
+    ordered = sorted(scores.items(), key = lambda x:x[1], reverse = True)
+    for i, (strategy, score) in enumerate(ordered):
+        if score != previous_score:
+            previous_score = score
+            previous_rank = i+1
+        ranking[strategy] = previous_rank
+    return ranking
+
+def build_report(strategies, total_records):
+    """derives scores and rankings from records and gathers them into one report dictionary"""
     strategies_list = list(strategies.values())
 
     # initializing
@@ -126,71 +146,140 @@ def make_report(strategies, total_records):
         given_scores[left] = 0
         for right in strategies_list:
             total_scores[(left, right)] = 0
-    
-    # derives total_scores from total_records
-    for pairs_of_strategies in list(total_records.keys()):
-        for i in range(len(total_records[pairs_of_strategies][0])):
-            left_score, right_score = payoff(total_records[pairs_of_strategies][0][i], total_records[pairs_of_strategies][1][i])
+
+    # derives total_scores from total_records.
+    # each match has only a few kinds of (left, right) decision pairs, so pairs are counted first
+    # and payoff is called once per kind of pair, not once per round
+    payoffs = {}
+    for pair_of_strategies, (left_decisions, right_decisions) in total_records.items():
+        left, right = pair_of_strategies
+        for decisions, count in Counter(zip(left_decisions, right_decisions)).items():
+            if decisions not in payoffs:
+                payoffs[decisions] = payoff(*decisions)
+            left_score, right_score = payoffs[decisions]
             # in case of mirror-match, average score will be used(so, 0.5 score exists)
-            if pairs_of_strategies[0] == pairs_of_strategies[1]:
-                total_scores[(pairs_of_strategies[0], pairs_of_strategies[1])] += (left_score+right_score)/2
+            if left == right:
+                total_scores[(left, right)] += (left_score+right_score)/2*count
             else:
-                total_scores[(pairs_of_strategies[0], pairs_of_strategies[1])] += left_score
-                total_scores[(pairs_of_strategies[1], pairs_of_strategies[0])] += right_score
-                
+                total_scores[(left, right)] += left_score*count
+                total_scores[(right, left)] += right_score*count
+
     # derives obtained and given scores from total scores
-    for left in strategies_list:
-        for right in strategies_list:
-            obtained_scores[left] += total_scores[(left, right)]
-            given_scores[right] += total_scores[(left, right)]
+    for (left, right), score in total_scores.items():
+        obtained_scores[left] += score
+        given_scores[right] += score
+
+    # each ranking is computed once, not once per strategy
+    obtained_ranking = rank_scores(obtained_scores)
+    given_ranking = rank_scores(given_scores)
 
-    # generates report
-    from time import time
-    now = int(time())
     x = len(strategies)
-    report_file = f'report_file_{now}.csv'
-    f = open(report_file, 'w')
-    strategy_files = list(strategies.keys())
-    
-    f.write('file,strategy\n')
-    for i in range(len(strategy_files)):            
-        f.write(f'{strategy_files[i]},{strategies[strategy_files[i]]}\n')
-    f.write('\n')
     total_match = int(x*(x+1)/2)
-    rounds_of_each_match = len(list(total_records.values())[0][0])
-    f.write(f'matches (A),{total_match}\n')
-    f.write(f'rounds (B),{rounds_of_each_match}\n')
-    f.write(f'total games (A*B),{total_match*rounds_of_each_match}\n\n')
-    
-    f.write('score table')
-    for strategy_j in strategies_list:
-        f.write(f',{strategy_j}')
-    f.write(',sum,ranking\n')
-    for strategy_i in strategies_list:
-        f.write(f'{strategy_i}')
-        for strategy_j in strategies_list:
-            f.write(f',{total_scores[(strategy_i, strategy_j)]}')    
-        f.write(f',{obtained_scores[strategy_i]},{sorted(obtained_scores.values(), reverse = True).index(obtained_scores[strategy_i])+1}\n')
-    f.write('sum')
-    for strategy_j in strategies_list:
-        f.write(f',{given_scores[strategy_j]}')
-    f.write('\n')
-    f.write('ranking')
-    for strategy_j in strategies_list:
-        f.write(f',{sorted(given_scores.values(), reverse = True).index(given_scores[strategy_j])+1}')
-    f.write('\n\n')
-    
-    f.write('ranking,strategy,obtained\n')
-    obtained_scores = sorted(obtained_scores.items(), key = lambda x:x[1], reverse = True)
-    for i in range(len(obtained_scores)):
-        f.write(f'{i+1},{obtained_scores[i][0]},{obtained_scores[i][1]}\n')
-    f.write('\n')
-    
-    f.write('ranking,strategy,given\n')
-    given_scores = sorted(given_scores.items(), key = lambda x:x[1], reverse = True)
-    for i in range(len(given_scores)):
-        f.write(f'{i+1},{given_scores[i][0]},{given_scores[i][1]}\n')
-    f.close()
+    rounds_of_each_match = len(next(iter(total_records.values()))[0])
+    return {
+        'files': [{'file': file, 'strategy': strategy} for file, strategy in strategies.items()],
+        'matches': total_match,
+        'rounds': rounds_of_each_match,
+        'total_games': total_match*rounds_of_each_match,
+        'strategies': strategies_list,
+        # score_table[i][j] is the score strategies[i] obtained against strategies[j]
+        'score_table': [[total_scores[(left, right)] for right in strategies_list] for left in strategies_list],
+        'obtained': [{'ranking': obtained_ranking[strategy], 'strategy': strategy, 'score': score}
+                     for strategy, score in sorted(obtained_scores.items(), key = lambda x:x[1], reverse = True)],
+        'given': [{'ranking': given_ranking[strategy], 'strategy': strategy, 'score': score}
+                  for strategy, score in sorted(given_scores.items(), key = lambda x:x[1], reverse = True)],
+    }
+
+def open_new_report_file(extension, mode = 'w'):
+    """opens a report file which did not exist before, so reports of the same second never overwrite each other"""
+    from time import time
+    now = int(time())
+    count = 0
+    while True:
+        suffix = '' if count == 0 else f'_{count}'
+        report_file = f'report_file_{now}{suffix}.{extension}'
+        try:
+            # 'x' mode fails when the file already exists
+            if 'b' in mode:
+                return report_file, open(report_file, mode.replace('w', 'x'))
+            return report_file, open(report_file, mode.replace('w', 'x'), encoding = 'utf-8', newline = '')
+        except FileExistsError:
+            count += 1
+
+def write_csv_report(report, f):
+    """writes report as csv sections: files, summary, score table, obtained ranking, given ranking"""
+    import csv
+    writer = csv.writer(f, lineterminator = '\n')
+    strategies_list = report['strategies']
+    obtained = {row['strategy']: row for row in report['obtained']}
+    given = {row['strategy']: row for row in report['given']}
+
+    rows = [['file', 'strategy']]
+    rows += [[row['file'], row['strategy']] for row in report['files']]
+    rows.append([])
+    rows.append(['matches (A)', report['matches']])
+    rows.append(['rounds (B)', report['rounds']])
+    rows.append(['total games (A*B)', report['total_games']])
+    rows.append([])
+
+    rows.append(['score table'] + strategies_list + ['sum', 'ranking'])
+    for strategy_i, scores in zip(strategies_list, report['score_table']):
+        rows.append([strategy_i] + scores + [obtained[strategy_i]['score'], obtained[strategy_i]['ranking']])
+    rows.append(['sum'] + [given[strategy_j]['score'] for strategy_j in strategies_list])
+    rows.append(['ranking'] + [given[strategy_j]['ranking'] for strategy_j in strategies_list])
+    rows.append([])
+
+    rows.append(['ranking', 'strategy', 'obtained'])
+    rows += [[row['ranking'], row['strategy'], row['score']] for row in report['obtained']]
+    rows.append([])
+
+    rows.append(['ranking', 'strategy', 'given'])
+    rows += [[row['ranking'], row['strategy'], row['score']] for row in report['given']]
+    writer.writerows(rows)
+
+def write_json_report(report, f):
+    """writes report as it is"""
+    import json
+    # no indent: score_table has N*N cells, one line per cell would be too long to read or load
+    json.dump(report, f, ensure_ascii = False)
+
+def write_parquet_report(report, f):
+    """writes one row per strategy: scores against each opponent(vs_<opponent>), obtained/given scores and rankings"""
+    import pandas as pd
+    strategies_list = report['strategies']
+    obtained = {row['strategy']: row for row in report['obtained']}
+    given = {row['strategy']: row for row in report['given']}
+    columns = {
+        'file': [row['file'] for row in report['files']],
+        'strategy': strategies_list,
+    }
+    # opponent columns are prefixed, so a strategy named like 'file' or 'obtained' can't overwrite the other columns
+    for j, strategy_j in enumerate(strategies_list):
+        columns[f'vs_{strategy_j}'] = [float(scores[j]) for scores in report['score_table']]
+    columns['obtained'] = [float(obtained[strategy]['score']) for strategy in strategies_list]
+    columns['obtained_ranking'] = [obtained[strategy]['ranking'] for strategy in strategies_list]
+    columns['given'] = [float(given[strategy]['score']) for strategy in strategies_list]
+    columns['given_ranking'] = [given[strategy]['ranking'] for strategy in strategies_list]
+    pd.DataFrame(columns).to_parquet(f, index = False)
+
+report_writers = {
+    'csv': write_csv_report,
+    'json': write_json_report,
+    'parquet': write_parquet_report,
+}
+
+def make_report(strategies, total_records, report_format = 'csv'):
+    """after deriving scores from records, generates report in csv, json or parquet format"""
+    if report_format not in report_writers:
+        print(f"report format should be one of {list(report_writers)}, but '{report_format}' was given.")
+        raise Exception
+    report = build_report(strategies, total_records)
+
+    # parquet is a binary format, so the file is opened in binary mode
+    mode = 'wb' if report_format == 'parquet' else 'w'
+    report_file, f = open_new_report_file(report_format, mode)
+    with f:
+        report_writers[report_format](report, f)
     return report_file
 
 if __name__ == '__main__':
@@ -206,8 +295,10 @@ if __name__ == '__main__':
     # after game league, a bunch of lists consist of 'C'(Cooperate) and 'D'(Defect) are returned as values of a dictionary
     total_records = play_full_league(directory, strategies)
 
-    # csv report file can be derived from strategies information and game records
-    report_file = make_report(strategies, total_records)
+    # report file(csv by default, or json/parquet given as the first argument) can be derived from strategies information and game records
+    import sys
+    report_format = sys.argv[1] if len(sys.argv) > 1 else 'csv'
+    report_file = make_report(strategies, total_records, report_format)
 
     # message below presents success of whole process
     print(f'{report_file} was successfully generated')